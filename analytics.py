@@ -0,0 +1,308 @@
+# coding: utf-8
+import copy
+import math
+from collections import deque
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+# Janelas móveis (em dias corridos) usadas no painel
+WINDOWS = (7, 30, 90)
+
+# Métricas numéricas e hábitos acompanhados
+METRICS = ('Sono (horas)', 'Sentimento (1-10)')
+HABITS = ('Treino', 'Meditação', 'Leitura', 'Dieta')
+
+
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+class RollingMoments:
+    """Média e variância em janela móvel de N dias (algoritmo de Welford).
+
+    Cada valor entra e sai da janela uma única vez, então `add` é O(1) amortizado.
+    """
+
+    def __init__(self, window_days: int):
+        self.window_days = window_days
+        self.values: deque = deque()
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def _push(self, x: float):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def _pop(self, x: float):
+        if self.n <= 1:
+            self.n, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        old_mean = self.mean
+        self.n -= 1
+        self.mean = (old_mean * (self.n + 1) - x) / self.n
+        self.m2 = max(0.0, self.m2 - (x - self.mean) * (x - old_mean))
+
+    def advance(self, day: date):
+        """Avança a janela até `day`, removendo os valores que ficaram de fora."""
+        start = day - timedelta(days=self.window_days - 1)
+        while self.values and self.values[0][0] < start:
+            self._pop(self.values.popleft()[1])
+
+    def trimmed(self, day: date) -> 'RollingMoments':
+        """Cópia da janela avançada até `day` (a janela original não muda)."""
+        window = copy.copy(self)
+        window.values = deque(self.values)
+        window.advance(day)
+        return window
+
+    def add(self, day: date, x: Optional[float]):
+        """Avança a janela até `day` e inclui o valor (valores ausentes só avançam a janela)."""
+        self.advance(day)
+        if _is_missing(x):
+            return
+        self.values.append((day, x))
+        self._push(float(x))
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class RollingCorrelation:
+    """Correlação de Pearson entre duas séries em janela móvel de N dias (Welford bivariado)."""
+
+    def __init__(self, window_days: int):
+        self.window_days = window_days
+        self.values: deque = deque()
+        self.n = 0
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self.m2_x = 0.0
+        self.m2_y = 0.0
+        self.c = 0.0
+
+    def _push(self, x: float, y: float):
+        self.n += 1
+        dx = x - self.mean_x
+        dy = y - self.mean_y
+        self.mean_x += dx / self.n
+        self.mean_y += dy / self.n
+        self.m2_x += dx * (x - self.mean_x)
+        self.m2_y += dy * (y - self.mean_y)
+        self.c += dx * (y - self.mean_y)
+
+    def _pop(self, x: float, y: float):
+        if self.n <= 1:
+            self.n, self.mean_x, self.mean_y = 0, 0.0, 0.0
+            self.m2_x, self.m2_y, self.c = 0.0, 0.0, 0.0
+            return
+        old_x, old_y = self.mean_x, self.mean_y
+        self.n -= 1
+        self.mean_x = (old_x * (self.n + 1) - x) / self.n
+        self.mean_y = (old_y * (self.n + 1) - y) / self.n
+        self.m2_x = max(0.0, self.m2_x - (x - self.mean_x) * (x - old_x))
+        self.m2_y = max(0.0, self.m2_y - (y - self.mean_y) * (y - old_y))
+        self.c -= (x - self.mean_x) * (y - old_y)
+
+    def advance(self, day: date):
+        """Avança a janela até `day`, removendo os pares que ficaram de fora."""
+        start = day - timedelta(days=self.window_days - 1)
+        while self.values and self.values[0][0] < start:
+            _, old_x, old_y = self.values.popleft()
+            self._pop(old_x, old_y)
+
+    def trimmed(self, day: date) -> 'RollingCorrelation':
+        """Cópia da janela avançada até `day` (a janela original não muda)."""
+        window = copy.copy(self)
+        window.values = deque(self.values)
+        window.advance(day)
+        return window
+
+    def add(self, day: date, x: Optional[float], y: Optional[float]):
+        """Avança a janela até `day` e inclui o par (x, y) se ambos estiverem presentes."""
+        self.advance(day)
+        if _is_missing(x) or _is_missing(y):
+            return
+        self.values.append((day, float(x), float(y)))
+        self._push(float(x), float(y))
+
+    @property
+    def value(self) -> Optional[float]:
+        if self.n < 3 or self.m2_x <= 0 or self.m2_y <= 0:
+            return None
+        return max(-1.0, min(1.0, self.c / math.sqrt(self.m2_x * self.m2_y)))
+
+
+class StreakTracker:
+    """Sequência atual e recorde de dias consecutivos com um hábito.
+
+    Vários registros no mesmo dia são combinados: o dia conta se algum deles marcou o hábito.
+    """
+
+    def __init__(self):
+        self.current = 0
+        self.longest = 0
+        self.last_done: Optional[date] = None
+        self._day: Optional[date] = None
+        self._day_done = False
+        self._before_day: Tuple[int, int, Optional[date]] = (0, 0, None)
+
+    def add(self, day: date, done: bool):
+        if day == self._day:
+            # Outro registro do mesmo dia: refazer o dia com o resultado combinado
+            done = done or self._day_done
+            self.current, self.longest, self.last_done = self._before_day
+        else:
+            self._day = day
+            self._before_day = (self.current, self.longest, self.last_done)
+        self._day_done = done
+
+        if not done:
+            self.current = 0
+            return
+        if self.last_done is not None and self.last_done == day - timedelta(days=1):
+            self.current += 1
+        else:
+            self.current = 1
+        self.last_done = day
+        self.longest = max(self.longest, self.current)
+
+    def current_as_of(self, day: date) -> int:
+        """Sequência atual considerando que dias sem registro quebram a sequência."""
+        if self.last_done is None or self.last_done < day - timedelta(days=1):
+            return 0
+        return self.current
+
+
+class AnalyticsEngine:
+    """Agrega médias móveis, sequências de hábitos e correlação sono-sentimento.
+
+    Os dias devem chegar em ordem cronológica; cada `append_day` atualiza
+    todas as estatísticas em O(1) e registra um ponto nas séries para os gráficos.
+    """
+
+    def __init__(self, windows: Tuple[int, ...] = WINDOWS):
+        self.windows = windows
+        self.moments: Dict[Tuple[str, int], RollingMoments] = {
+            (metric, w): RollingMoments(w) for metric in METRICS for w in windows
+        }
+        self.correlations: Dict[int, RollingCorrelation] = {w: RollingCorrelation(w) for w in windows}
+        self.streaks: Dict[str, StreakTracker] = {habit: StreakTracker() for habit in HABITS}
+        self.last_date: Optional[date] = None
+        self.fingerprint: Optional[int] = None
+        self._history: List[dict] = []
+
+    def append_day(self, day: date, row: dict):
+        """
+        Adiciona um registro ao motor.
+
+        Args:
+            day: Data do registro (não pode ser anterior ao último registro)
+            row: Valores das colunas processadas (METRICS e HABITS); ausentes são ignorados
+        """
+        if self.last_date is not None and day < self.last_date:
+            raise ValueError(f"Registro fora de ordem: {day} < {self.last_date}")
+
+        sleep = row.get('Sono (horas)')
+        if not _is_missing(sleep) and sleep <= 0:
+            sleep = None  # 0.0 indica que o parser não encontrou sono
+        values = {'Sono (horas)': sleep, 'Sentimento (1-10)': row.get('Sentimento (1-10)')}
+
+        point = {'Data': pd.Timestamp(day)}
+        for (metric, w), moments in self.moments.items():
+            moments.add(day, values[metric])
+            point[f'{metric} {w}d'] = moments.mean if moments.n else None
+        for w, corr in self.correlations.items():
+            corr.add(day, values['Sono (horas)'], values['Sentimento (1-10)'])
+            point[f'Correlação Sono x Sentimento {w}d'] = corr.value
+        for habit, streak in self.streaks.items():
+            streak.add(day, bool(row.get(habit, False)))
+            point[f'Sequência {habit}'] = streak.current
+
+        if self._history and self._history[-1]['Data'] == point['Data']:
+            self._history[-1] = point
+        else:
+            self._history.append(point)
+
+        self.last_date = day
+
+    @staticmethod
+    def _fingerprint(df: pd.DataFrame) -> int:
+        """Hash (independente da ordem) da data, métricas e hábitos das linhas."""
+        columns = [c for c in ('Data', *METRICS, *HABITS) if c in df.columns]
+        return int(pd.util.hash_pandas_object(df[columns].astype(str), index=False).sum())
+
+    def update_from_frame(self, df: pd.DataFrame) -> bool:
+        """
+        Sincroniza com o DataFrame processado, adicionando só os dias novos.
+
+        Returns:
+            False se o histórico mudou (edição/remoção) e o motor precisa ser reconstruído
+        """
+        dates = pd.to_datetime(df['Data'], errors='coerce')
+        valid = df[dates.notna()]
+        dates = dates[dates.notna()]
+
+        if self.last_date is None:
+            newer = valid
+        else:
+            is_new = dates.dt.date > self.last_date
+            newer = valid[is_new]
+            if self._fingerprint(valid[~is_new]) != self.fingerprint:
+                return False
+
+        ordered = newer.assign(_dia=pd.to_datetime(newer['Data']).dt.date).sort_values('_dia', kind='stable')
+        for row in ordered.to_dict('records'):
+            self.append_day(row['_dia'], row)
+        self.fingerprint = self._fingerprint(valid)
+        return True
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, windows: Tuple[int, ...] = WINDOWS) -> 'AnalyticsEngine':
+        """Constrói o motor a partir de todo o histórico processado."""
+        engine = cls(windows)
+        engine.update_from_frame(df)
+        return engine
+
+    def series(self) -> pd.DataFrame:
+        """Séries prontas para gráfico (um ponto por dia com registro)."""
+        if not self._history:
+            return pd.DataFrame(columns=['Data'])
+        return pd.DataFrame(self._history)
+
+    def summary(self, as_of: Optional[date] = None) -> dict:
+        """
+        Valores atuais para o painel de KPIs (janelas terminadas em `as_of`).
+
+        Returns:
+            Dict com médias/desvios por janela, correlações e sequências (atual e recorde)
+        """
+        as_of = as_of or self.last_date
+        result = {'averages': {}, 'std': {}, 'correlation': {}, 'streaks': {}}
+
+        # Dias sem registro até `as_of` também tiram valores antigos das janelas; as janelas
+        # do motor não são alteradas (um dia anterior a `as_of` ainda pode ser adicionado)
+        trim = as_of is not None and self.last_date is not None and as_of > self.last_date
+
+        for (metric, w), moments in self.moments.items():
+            moments = moments.trimmed(as_of) if trim else moments
+            result['averages'][(metric, w)] = round(moments.mean, 1) if moments.n else None
+            result['std'][(metric, w)] = round(moments.std, 2) if moments.n else None
+        for w, corr in self.correlations.items():
+            corr = corr.trimmed(as_of) if trim else corr
+            result['correlation'][w] = None if corr.value is None else round(corr.value, 2)
+        for habit, streak in self.streaks.items():
+            result['streaks'][habit] = {
+                'current': streak.current_as_of(as_of) if as_of else 0,
+                'longest': streak.longest,
+            }
+        return result
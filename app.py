@@ -1,11 +1,14 @@
 # coding: utf-8
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
 from datetime import datetime, timedelta
-import re
 from db_manager import SheetManager
+from time_parser import sleep_hours, parse_sleep_series
+from search_index import JournalSearchIndex
+from analytics import AnalyticsEngine, HABITS
+from insights import get_segment_insights
+from profiler import run_with_profiling
+from resposta_decoder import with_resposta_metrics
 
 # ==========================================
 # CONFIGURAÇÃO DA PÁGINA
@@ -23,38 +26,13 @@ st.set_page_config(
 def parse_sleep_data(text: str) -> float:
     """
     Extrai horas de sono do texto.
-    Busca padrões como "dormi às 23h", "acordei às 7h", "8 horas de sono"
+    Busca padrões como "dormi às 23h", "acordei às 7h", "8 horas de sono", "dormi 7h30"
+    (ver time_parser.parse_sleep para os registros completos de cada noite)
     """
     if pd.isna(text) or not isinstance(text, str):
         return 0.0
 
-    # Padrões para horas de dormir e acordar
-    sleep_patterns = {
-        'dormir|dormi|sleep': r'(?:dormir|dormi|sleep)\s*(?:às|at)?\s*(\d{1,2})h?(\d{2})?',
-        'acordar|acordei|wake': r'(?:acordar|acordei|wake)\s*(?:às|at)?\s*(\d{1,2})h?(\d{2})?',
-    }
-
-    hours_found = []
-
-    for keyword, pattern in sleep_patterns.items():
-        matches = re.finditer(pattern, text.lower())
-        for match in matches:
-            hour = int(match.group(1))
-            minute = int(match.group(2)) if match.group(2) else 0
-            hours_found.append(hour + minute / 60)
-
-    # Se encontrou dormir e acordar, calcular diferença
-    if len(hours_found) >= 2:
-        sleep_time = hours_found[0]
-        wake_time = hours_found[1]
-
-        if wake_time < sleep_time:
-            wake_time += 24  # Ajustar para próximo dia
-
-        total_sleep = wake_time - sleep_time
-        return round(total_sleep, 2)
-    else:
-        return 0.0
+    return sleep_hours(text)
 
 def parse_workout(text: str) -> tuple:
     """
@@ -133,7 +111,8 @@ def parse_routine_keywords(text: str) -> dict:
 
     keywords = {
         'meditacao': ['meditei', 'meditação', 'mindfulness'],
-        'leitura': ['li', 'livro', 'lei', 'estudei']
+        'leitura': ['li', 'livro', 'lei', 'estudei'],
+        'dieta': ['dieta', 'salada', 'jejum', 'low carb', 'comi bem', 'alimentação saudável']
     }
 
     result = {}
@@ -149,7 +128,7 @@ def process_data(df: pd.DataFrame) -> pd.DataFrame:
     df_processed = df.copy()
 
     # Aplicar parsing
-    df_processed['Sono (horas)'] = df_processed['Mensagem Crua'].apply(parse_sleep_data)
+    df_processed['Sono (horas)'] = parse_sleep_series(df_processed['Mensagem Crua'])
     df_processed['Treino'] = df_processed['Mensagem Crua'].apply(lambda x: parse_workout(x)[0])
     df_processed['Tipo Treino'] = df_processed['Mensagem Crua'].apply(lambda x: parse_workout(x)[1])
     df_processed['Sentimento (1-10)'] = df_processed['Mensagem Crua'].apply(calculate_sentiment)
@@ -171,12 +150,16 @@ def process_data(df: pd.DataFrame) -> pd.DataFrame:
 # ==========================================
 # FUNÇÕES DE VISUALIZAÇÃO
 # ==========================================
+# Plotly é importado dentro das funções: o custo de import só é pago
+# quando a aba Dashboard renderiza um gráfico (reduz o cold start).
 
 def create_temporal_chart(df: pd.DataFrame):
     """Gráfico temporal com Sono e Sentimento."""
     if df.empty or 'Sono (horas)' not in df.columns:
         return None
 
+    import plotly.graph_objects as go
+
     df_sorted = df.sort_values('Data')
 
     fig = go.Figure()
@@ -216,6 +199,8 @@ def create_workout_heatmap(df: pd.DataFrame):
     if df.empty or 'Data' not in df.columns:
         return None
 
+    import plotly.express as px
+
     df_temp = df.copy()
     if not pd.api.types.is_datetime64_any_dtype(df_temp['Data']):
         df_temp['Data'] = pd.to_datetime(df_temp['Data'], errors='coerce')
@@ -247,6 +232,98 @@ def create_workout_heatmap(df: pd.DataFrame):
 
     return fig
 
+def create_rolling_chart(series: pd.DataFrame, windows=(7, 30)):
+    """Gráfico de médias móveis de Sono e Sentimento (séries do AnalyticsEngine)."""
+    if series.empty:
+        return None
+
+    import plotly.graph_objects as go
+
+    colors = {'Sono (horas)': '#3498db', 'Sentimento (1-10)': '#e74c3c'}
+    dashes = {7: 'solid', 30: 'dash', 90: 'dot'}
+
+    fig = go.Figure()
+    for metric, color in colors.items():
+        for w in windows:
+            column = f'{metric} {w}d'
+            if column not in series.columns:
+                continue
+            fig.add_trace(go.Scatter(
+                x=series['Data'],
+                y=series[column],
+                mode='lines',
+                name=f'{metric} ({w}d)',
+                line=dict(color=color, width=2, dash=dashes.get(w, 'solid'))
+            ))
+
+    fig.update_layout(
+        title='📉 Médias Móveis: Sono x Sentimento',
+        xaxis_title='Data',
+        hovermode='x unified',
+        height=400,
+        template='plotly_white'
+    )
+
+    return fig
+
+def create_ai_metrics_chart(df: pd.DataFrame):
+    """Comparativo semanal: treino pelo parser de palavras-chave x treino segundo a IA (coluna Resposta)."""
+    if df.empty or 'IA Exercitou' not in df.columns or df['IA Exercitou'].notna().sum() == 0:
+        return None
+
+    import plotly.graph_objects as go
+
+    weekly = (
+        df.set_index('Data')[['Treino', 'IA Exercitou', 'IA Completude (%)']]
+        .astype(float)
+        .resample('W')
+        .mean()
+    )
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=weekly.index,
+        y=weekly['Treino'] * 100,
+        mode='lines+markers',
+        name='Treino (parser) %',
+        line=dict(color='#2ecc71', width=2)
+    ))
+    fig.add_trace(go.Scatter(
+        x=weekly.index,
+        y=weekly['IA Exercitou'] * 100,
+        mode='lines+markers',
+        name='Treino (IA) %',
+        line=dict(color='#9b59b6', width=2)
+    ))
+    fig.add_trace(go.Bar(
+        x=weekly.index,
+        y=weekly['IA Completude (%)'],
+        name='Completude do Journal %',
+        marker_color='rgba(149, 165, 166, 0.4)'
+    ))
+
+    fig.update_layout(
+        title='🤖 Métricas da IA x Parser (semanal)',
+        xaxis_title='Semana',
+        hovermode='x unified',
+        height=400,
+        template='plotly_white'
+    )
+
+    return fig
+
+def get_analytics_engine(df: pd.DataFrame) -> AnalyticsEngine:
+    """
+    Mantém o AnalyticsEngine na sessão, adicionando só os dias novos a cada rerun.
+    Reconstrói do zero se registros já processados foram editados ou removidos
+    (detectado pelo hash de data, métricas e hábitos desses registros).
+    """
+    engine = st.session_state.get('analytics')
+    if engine is None or not engine.update_from_frame(df):
+        engine = AnalyticsEngine.from_frame(df)
+        st.session_state.analytics = engine
+    return engine
+
 def calculate_kpis(df: pd.DataFrame) -> dict:
     """Calcula KPIs do período."""
     if df.empty:
@@ -264,8 +341,11 @@ def calculate_kpis(df: pd.DataFrame) -> dict:
         'total_days': len(df)
     }
 
-def generate_insight(df: pd.DataFrame, kpis: dict) -> str:
-    """Gera insight textual sobre os dados."""
+def generate_insight(df: pd.DataFrame, kpis: dict, segment_insights: list = None) -> str:
+    """
+    Gera insight textual sobre os dados.
+    `segment_insights` são os vereditos de comparação entre segmentos (ver insights.py).
+    """
     insights = []
 
     # Sono
@@ -290,17 +370,99 @@ def generate_insight(df: pd.DataFrame, kpis: dict) -> str:
     elif kpis['avg_sentiment'] <= 4:
         insights.append(f"😔 **Sentimento:** Precisa de atenção ({kpis['avg_sentiment']}/10)")
 
+    # Comparações entre segmentos (fds, período anterior, mês, tipo de treino)
+    for text in segment_insights or []:
+        insights.append(f"🔎 **Veredito:** {text}")
+
     return "\n\n".join(insights)
 
+# ==========================================
+# EDITOR PAGINADO
+# ==========================================
+
+EDITOR_COLUMNS = ['Data', 'Mensagem Crua', 'Resposta']
+EDITOR_PAGE_SIZES = [10, 25, 50, 100]
+
+def get_editor_page(df: pd.DataFrame, page: int, page_size: int) -> pd.DataFrame:
+    """
+    Retorna apenas as linhas da página visível do editor.
+    A ordem é estável pelo id da linha na planilha (índice do DataFrame),
+    e a coluna Data é formatada só para as linhas da página.
+    """
+    row_ids = df.index.sort_values()
+    page_ids = row_ids[page * page_size:(page + 1) * page_size]
+
+    df_page = df.loc[page_ids, EDITOR_COLUMNS].copy()
+    df_page['Data'] = pd.to_datetime(df_page['Data'], errors='coerce').dt.strftime('%d/%m/%Y')
+    return df_page.fillna('')
+
+def apply_dirty_rows(df_page: pd.DataFrame, dirty_rows: dict) -> pd.DataFrame:
+    """Sobrepõe na página as edições pendentes (feitas em outras renderizações)."""
+    df_display = df_page.copy()
+    for row_id in df_display.index.intersection(list(dirty_rows)):
+        for col, value in dirty_rows[row_id].items():
+            df_display.at[row_id, col] = value
+    return df_display
+
+def update_dirty_rows(dirty_rows: dict, df_original: pd.DataFrame, df_edited: pd.DataFrame):
+    """
+    Atualiza o registro de linhas editadas comparando a página editada com a original.
+    Células que voltaram ao valor original deixam de ser marcadas.
+    """
+    for row_id in df_original.index:
+        changes = {
+            col: df_edited.at[row_id, col]
+            for col in EDITOR_COLUMNS
+            if str(df_edited.at[row_id, col]) != str(df_original.at[row_id, col])
+        }
+        if changes:
+            dirty_rows[row_id] = changes
+        else:
+            dirty_rows.pop(row_id, None)
+
+def save_dirty_rows(db: SheetManager, dirty_rows: dict) -> int:
+    """
+    Grava as células editadas na planilha, uma requisição em lote por aba.
+    Só as linhas efetivamente gravadas saem do registro de pendências.
+
+    Returns:
+        Número de células atualizadas
+    """
+    # Agrupar por aba (None = aba principal) as células de cada linha editada
+    by_shard = {}
+    for row_id, changes in sorted(dirty_rows.items()):
+        row, shard = db.locate_row(row_id)
+        cells = [(row, EDITOR_COLUMNS.index(col) + 1, value) for col, value in changes.items()]
+        by_shard.setdefault(shard, []).append((row_id, cells))
+
+    updated = 0
+    for shard, rows in by_shard.items():
+        updated += db.update_cells([cell for _, cells in rows for cell in cells], shard=shard)
+        for row_id, _ in rows:
+            dirty_rows.pop(row_id, None)
+    return updated
+
 # ==========================================
 # INTERFACE STREAMLIT
 # ==========================================
 
+# Período inicial no modo particionado (evita buscar todas as abas no primeiro acesso)
+SHARDED_DEFAULT_DAYS = 90
+
+def date_range_inputs(start_value, end_value) -> tuple:
+    """Campos de Data Início/Fim lado a lado."""
+    col1, col2 = st.columns(2)
+    with col1:
+        start_date = st.date_input("Data Início", value=start_value)
+    with col2:
+        end_date = st.date_input("Data Fim", value=end_value)
+    return start_date, end_date
+
 def main():
     st.title("📊 MIP - Motor de Inteligência de Performance")
     st.markdown("---")
 
-    # Inicializar SheetManager
+    # Inicializar SheetManager (a conexão só é feita no primeiro acesso aos dados)
     try:
         if 'db' not in st.session_state:
             st.session_state.db = SheetManager()
@@ -312,11 +474,24 @@ def main():
 
     # Carregar dados com cache
     @st.cache_data(ttl=300)  # Cache de 5 minutos
-    def load_data():
-        return st.session_state.db.get_data()
+    def load_data(start_date=None, end_date=None):
+        raw_df = st.session_state.db.get_data(start_date, end_date)
+        # Versão dos dados: chave de cache para cálculos derivados (ex: insights)
+        data_version = str(pd.util.hash_pandas_object(raw_df.astype(str), index=True).sum())
+        return raw_df, data_version
 
+    db = st.session_state.db
     try:
-        raw_df = load_data()
+        if db.sharding:
+            # Modo particionado: o período vem antes da leitura, para buscar só as abas necessárias
+            min_date, max_date = db.get_date_bounds()
+            default_start = max(min_date, max_date - timedelta(days=SHARDED_DEFAULT_DAYS))
+            start_date, end_date = date_range_inputs(default_start, max_date)
+            # Inclui o período anterior (mesma duração) para as comparações dos insights
+            previous_start = start_date - (end_date - start_date + timedelta(days=1))
+            raw_df, data_version = load_data(previous_start, end_date)
+        else:
+            raw_df, data_version = load_data()
         df = process_data(raw_df)
 
         if df.empty:
@@ -324,6 +499,7 @@ def main():
             df = pd.DataFrame(columns=['Data', 'Mensagem Crua', 'Resposta'])
     except Exception as e:
         st.error(f"❌ Erro ao carregar dados: {str(e)}")
+        st.info("💡 Verifique se o arquivo `service_account.json` está correto e se a planilha 'Journal Database' existe.")
         return
 
     # ==========================================
@@ -333,14 +509,8 @@ def main():
 
     # Filtro de data
     if not df.empty and 'Data' in df.columns:
-        min_date = df['Data'].min()
-        max_date = df['Data'].max()
-
-        col1, col2 = st.columns(2)
-        with col1:
-            start_date = st.date_input("Data Início", value=min_date)
-        with col2:
-            end_date = st.date_input("Data Fim", value=max_date)
+        if not db.sharding:
+            start_date, end_date = date_range_inputs(df['Data'].min(), df['Data'].max())
 
         if start_date and end_date:
             df_filtered = df[
@@ -352,6 +522,28 @@ def main():
 
         st.write(f"**Período Selecionado:** {len(df_filtered)} dias")
 
+    # Busca no diário (índice invertido, atualizado incrementalmente)
+    search_query = st.sidebar.text_input(
+        "🔎 Buscar no diário",
+        placeholder='treino "noite de sono" medit*'
+    )
+
+    if 'search_index' not in st.session_state:
+        st.session_state.search_index = JournalSearchIndex.load()
+
+    search_index = st.session_state.search_index
+    # No modo particionado df é só o intervalo carregado: não remover as demais linhas
+    if search_index.sync(df, remove_missing=not db.sharding):
+        try:
+            search_index.save()
+        except OSError as e:
+            print(f"⚠️ Não foi possível salvar o índice de busca: {e}")
+
+    if search_query.strip():
+        matching_rows = search_index.search(search_query, start_date, end_date)
+        df_filtered = df_filtered[df_filtered.index.isin(matching_rows)]
+        st.sidebar.caption(f"{len(df_filtered)} registro(s) encontrado(s)")
+
     # KPIs na Sidebar
     kpis = calculate_kpis(df_filtered)
 
@@ -360,44 +552,90 @@ def main():
     st.metric("💪 Frequência Treino", f"{kpis['workout_freq']}%")
     st.metric("😊 Sentimento Médio", f"{kpis['avg_sentiment']}/10")
 
+    # Médias móveis e sequências (histórico completo, atualizado incrementalmente)
+    engine = get_analytics_engine(df)
+    analytics = engine.summary(as_of=datetime.now().date())
+
+    col1, col2, col3 = st.columns(3)
+    for col, w in zip((col1, col2, col3), engine.windows):
+        with col:
+            avg_sleep = analytics['averages'][('Sono (horas)', w)]
+            avg_sentiment = analytics['averages'][('Sentimento (1-10)', w)]
+            st.metric(f"😴 Sono {w}d", f"{avg_sleep}h" if avg_sleep is not None else "—")
+            st.metric(f"😊 Sentimento {w}d", f"{avg_sentiment}/10" if avg_sentiment is not None else "—")
+
+    habit_icons = {'Treino': '💪', 'Meditação': '🧘', 'Leitura': '📚', 'Dieta': '🥗'}
+    for col, habit in zip(st.columns(len(HABITS)), HABITS):
+        with col:
+            streak = analytics['streaks'][habit]
+            st.metric(
+                f"{habit_icons[habit]} Sequência {habit}",
+                f"{streak['current']} dias",
+                help=f"Recorde: {streak['longest']} dias"
+            )
+
     st.markdown("---")
-    st.markdown(f"**Insight do Período:** {generate_insight(df_filtered, kpis)}")
+    segment_insights = get_segment_insights(df, data_version, start_date, end_date)
+    st.markdown(f"**Insight do Período:** {generate_insight(df_filtered, kpis, segment_insights)}")
 
     # ==========================================
     # ABA PRINCIPAL
     # ==========================================
-    tab1, tab2, tab3 = st.tabs(["📊 Dashboard", "📝 Editor", "➕ Adicionar Novo"])
+    # Com key e on_change="rerun", trocar de aba gera um rerun e `.open` indica a aba
+    # selecionada: o Dashboard (e o import do Plotly) só roda quando está aberto
+    tab1, tab2, tab3 = st.tabs(
+        ["📊 Dashboard", "📝 Editor", "➕ Adicionar Novo"], key="main_tab", on_change="rerun"
+    )
 
     with tab1:
-        st.subheader("Dashboard de Performance")
-
-        if df_filtered.empty:
-            st.info("📊 Sem dados para exibir no período selecionado")
-        else:
-            col1, col2 = st.columns(2)
-
-            with col1:
-                fig_temporal = create_temporal_chart(df_filtered)
-                st.plotly_chart(fig_temporal, use_container_width=True)
-
-            with col2:
-                fig_heatmap = create_workout_heatmap(df_filtered)
-                st.plotly_chart(fig_heatmap, use_container_width=True)
-
-            # Gráficos de rosca para hábitos
-            col3, col4, col5 = st.columns(3)
-
-            habit_names = {'Meditação': '🧘 Meditação', 'Leitura': '📚 Leitura', 'Dieta': '🥗 Dieta Saudável'}
-
-            for i, (habit, name) in enumerate(habit_names.items(), start=1):
-                if df_filtered[habit].sum() > 0:
-                    fig = px.pie(
-                        values=[df_filtered[habit].sum(), len(df_filtered) - df_filtered[habit].sum()],
-                        names=['Sim', 'Não'],
-                        hole=0.6,
-                        title=f'{name}'
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
+        if tab1.open:
+            st.subheader("Dashboard de Performance")
+
+            if df_filtered.empty:
+                st.info("📊 Sem dados para exibir no período selecionado")
+            else:
+                col1, col2 = st.columns(2)
+
+                with col1:
+                    fig_temporal = create_temporal_chart(df_filtered)
+                    st.plotly_chart(fig_temporal, use_container_width=True)
+
+                with col2:
+                    fig_heatmap = create_workout_heatmap(df_filtered)
+                    st.plotly_chart(fig_heatmap, use_container_width=True)
+
+                fig_rolling = create_rolling_chart(engine.series())
+                if fig_rolling is not None:
+                    st.plotly_chart(fig_rolling, use_container_width=True)
+
+                # Métricas da IA: a coluna Resposta só é decodificada para as linhas do período
+                df_ai = with_resposta_metrics(df_filtered)
+                fig_ai = create_ai_metrics_chart(df_ai)
+                if fig_ai is not None:
+                    st.plotly_chart(fig_ai, use_container_width=True)
+                    total_spent = df_ai['IA Gasto (R$)'].sum()
+                    if total_spent > 0:
+                        st.caption(f"💸 Gastos mencionados no período (IA): R$ {total_spent:,.2f}")
+
+                correlation = analytics['correlation'].get(30)
+                if correlation is not None:
+                    st.caption(f"🔗 Correlação Sono x Sentimento (30d): {correlation}")
+
+                # Gráficos de rosca para hábitos
+                col3, col4, col5 = st.columns(3)
+
+                import plotly.express as px
+                habit_names = {'Meditação': '🧘 Meditação', 'Leitura': '📚 Leitura', 'Dieta': '🥗 Dieta Saudável'}
+
+                for i, (habit, name) in enumerate(habit_names.items(), start=1):
+                    if df_filtered[habit].sum() > 0:
+                        fig = px.pie(
+                            values=[df_filtered[habit].sum(), len(df_filtered) - df_filtered[habit].sum()],
+                            names=['Sim', 'Não'],
+                            hole=0.6,
+                            title=f'{name}'
+                        )
+                        st.plotly_chart(fig, use_container_width=True)
 
     with tab2:
         st.subheader("Editor de Registros")
@@ -405,15 +643,35 @@ def main():
         if df_filtered.empty:
             st.info("📊 Sem dados para editar")
         else:
-            df_display = df_filtered[['Data', 'Mensagem Crua', 'Resposta']].copy()
-            df_display['Data'] = pd.to_datetime(df_display['Data'], errors='coerce').dt.strftime('%d/%m/%Y')
-            df_display['Data'] = pd.to_datetime(df_display['Data'], errors='coerce').dt.strftime('%d/%m/%Y')
+            if 'editor_dirty' not in st.session_state:
+                st.session_state.editor_dirty = {}
+            dirty_rows = st.session_state.editor_dirty
+
+            col1, col2 = st.columns(2)
+            with col1:
+                page_size = st.selectbox("Linhas por página", EDITOR_PAGE_SIZES, index=1)
+            total_pages = max(1, -(-len(df_filtered) // page_size))
+            with col2:
+                page = st.number_input("Página", min_value=1, max_value=total_pages, value=1, step=1)
+
+            df_page = get_editor_page(df_filtered, int(page) - 1, page_size)
+            edited_df = st.data_editor(
+                apply_dirty_rows(df_page, dirty_rows),
+                key=f"editor_page_{page_size}_{page}",
+                use_container_width=True
+            )
+            update_dirty_rows(dirty_rows, df_page, edited_df)
 
-            edited_df = st.data_editor(df_display, num_rows="dynamic", use_container_width=True)
+            st.caption(f"Página {page} de {total_pages} · {len(dirty_rows)} linha(s) alterada(s)")
 
-            if st.button("💾 Salvar Alterações"):
-                st.success("✅ Alterações salvas na planilha!")
-                st.info("💡 Nota: A sincronização bidirecional com Google Sheets será implementada na próxima versão.")
+            if st.button("💾 Salvar Alterações", disabled=not dirty_rows):
+                try:
+                    updated = save_dirty_rows(st.session_state.db, dirty_rows)
+                    st.success(f"✅ {updated} célula(s) salva(s) na planilha!")
+                    st.cache_data.clear()
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"❌ Erro ao salvar alterações: {str(e)}")
 
             if st.button("🗑️ Deletar Linhas Selecionadas"):
                 st.warning("⚠️ Funcionalidade de deleção será implementada na próxima versão.")
@@ -456,4 +714,4 @@ def main():
                 st.info("💡 O parsing extrairá automaticamente: Sono, Treino, Sentimento e hábitos do texto digitado.")
 
 if __name__ == "__main__":
-    main()
+    run_with_profiling(main)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark do parser de sono.
+
+Compara time_parser.sleep_hours com o parse_sleep_data original (duas buscas
+por regex em todo o texto) sobre a coluna 'Mensagem Crua' de um CSV exportado
+da planilha. Sai com código 1 se o parser atual for mais lento que o original.
+
+Uso:
+    python bench_parser.py [--csv ARQUIVO] [--runs N]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+
+import pandas as pd
+
+from time_parser import sleep_hours
+
+DEFAULT_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Journal Database - Sheet1.csv')
+
+
+def legacy_parse_sleep_data(text: str) -> float:
+    """parse_sleep_data como era antes do time_parser (referência de desempenho)."""
+    sleep_patterns = {
+        'dormir|dormi|sleep': r'(?:dormir|dormi|sleep)\s*(?:às|at)?\s*(\d{1,2})h?(\d{2})?',
+        'acordar|acordei|wake': r'(?:acordar|acordei|wake)\s*(?:às|at)?\s*(\d{1,2})h?(\d{2})?',
+    }
+
+    hours_found = []
+    for keyword, pattern in sleep_patterns.items():
+        for match in re.finditer(pattern, text.lower()):
+            hour = int(match.group(1))
+            minute = int(match.group(2)) if match.group(2) else 0
+            hours_found.append(hour + minute / 60)
+
+    if len(hours_found) >= 2:
+        sleep_time, wake_time = hours_found[0], hours_found[1]
+        if wake_time < sleep_time:
+            wake_time += 24
+        return round(wake_time - sleep_time, 2)
+    return 0.0
+
+
+def measure(parser, texts, runs: int) -> float:
+    """Mediana (em segundos) de `runs` passadas do parser sobre todos os textos."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        for text in texts:
+            parser(text)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do parser de sono do MIP')
+    parser.add_argument('--csv', default=DEFAULT_CSV, help='CSV com a coluna "Mensagem Crua"')
+    parser.add_argument('--runs', type=int, default=30, help='Número de execuções')
+    args = parser.parse_args()
+
+    texts = pd.read_csv(args.csv)['Mensagem Crua'].dropna().astype(str).tolist()
+
+    print(f"\n{'='*60}")
+    print(f"⏱️  Benchmark do parser de sono ({len(texts)} registros)")
+    print(f"{'='*60}\n")
+
+    # Aquecimento (compilação das regex e caches do módulo re)
+    measure(legacy_parse_sleep_data, texts, 1)
+    measure(sleep_hours, texts, 1)
+
+    legacy = measure(legacy_parse_sleep_data, texts, args.runs)
+    current = measure(sleep_hours, texts, args.runs)
+
+    print(f"🐢 Original (parse_sleep_data): {legacy * 1000:.1f} ms (mediana de {args.runs})")
+    print(f"🚀 time_parser.sleep_hours:     {current * 1000:.1f} ms ({legacy / current:.2f}x)")
+
+    if current > legacy:
+        print("\n❌ O parser atual está mais lento que o original")
+        sys.exit(1)
+    print("\n✅ O parser atual não é mais lento que o original")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark de inicialização do app.
+
+Mede:
+1. Tempo de import dos módulos do app (processo novo, sem cache de módulos)
+2. Time-to-first-paint: tempo até o primeiro elemento (st.title) ser renderizado
+3. Tempo total do primeiro rerun
+
+Uso:
+    python bench_startup.py [--runs N] [--top N]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+APP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+
+
+def measure_imports(top: int):
+    """Importa o app em um processo novo com -X importtime e retorna (total_s, imports mais lentos do app)."""
+    app_dir = os.path.dirname(APP_FILE)
+    code = (
+        "import sys, time; sys.path.insert(0, %r); t = time.perf_counter(); "
+        "import app; print('TOTAL', time.perf_counter() - t)" % app_dir
+    )
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, cwd=app_dir
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    total = float(result.stdout.split('TOTAL')[-1].strip())
+
+    modules = []
+    for line in result.stderr.splitlines():
+        # Formato: "import time: self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split(':', 1)[1].split('|')
+        # A indentação indica a profundidade; profundidade 1 = imports feitos pelo app.py
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            modules.append((int(cumulative), name.strip()))
+
+    modules.sort(reverse=True)
+    return total, modules[:top]
+
+
+def measure_first_paint():
+    """Executa o app com AppTest e mede o tempo até o primeiro st.title e o rerun completo."""
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    first_paint = {}
+    original_title = st.title
+
+    def timed_title(*args, **kwargs):
+        first_paint.setdefault('t', time.perf_counter())
+        return original_title(*args, **kwargs)
+
+    st.title = timed_title
+    try:
+        at = AppTest.from_file(APP_FILE, default_timeout=120)
+        start = time.perf_counter()
+        at.run()
+        total = time.perf_counter() - start
+    finally:
+        st.title = original_title
+
+    paint = first_paint.get('t', start + total) - start
+    return paint, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de inicialização do MIP')
+    parser.add_argument('--runs', type=int, default=3, help='Número de execuções')
+    parser.add_argument('--top', type=int, default=10, help='Módulos mais lentos a exibir')
+    args = parser.parse_args()
+
+    print(f"\n{'='*60}")
+    print("⏱️  Benchmark de inicialização")
+    print(f"{'='*60}\n")
+
+    import_times = []
+    slowest = []
+    for _ in range(args.runs):
+        total, slowest = measure_imports(args.top)
+        import_times.append(total)
+
+    print(f"📦 Import do app: {statistics.median(import_times) * 1000:.0f} ms (mediana de {args.runs})")
+    print(f"\n🐢 Módulos mais lentos (cumulativo):")
+    for cumulative_us, name in slowest:
+        print(f"   {cumulative_us / 1000:8.1f} ms  {name}")
+
+    try:
+        paint_times, run_times = [], []
+        for _ in range(args.runs):
+            paint, total = measure_first_paint()
+            paint_times.append(paint)
+            run_times.append(total)
+    except ImportError as e:
+        print(f"\n⚠️  Time-to-first-paint indisponível: {e}")
+        return
+
+    # A primeira execução é a fria (módulos do app ainda não importados neste processo)
+    print(f"\n🎨 Time-to-first-paint: {paint_times[0] * 1000:.0f} ms (frio), "
+          f"{statistics.median(paint_times[1:] or paint_times) * 1000:.0f} ms (quente)")
+    print(f"🔁 Rerun completo: {run_times[0] * 1000:.0f} ms (frio), "
+          f"{statistics.median(run_times[1:] or run_times) * 1000:.0f} ms (quente)")
+    print("\n💡 O rerun inclui a conexão com o Google Sheets (se houver credenciais).")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,26 @@
-import gspread
 import pandas as pd
 import json
 import os
-from typing import Optional, Dict, Any
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Optional, Dict, Any, List, Tuple
+
+# Colunas padrão de cada aba da planilha
+COLUMNS = ['Data', 'Mensagem Crua', 'Resposta']
+
+# Particionamento opcional por aba: 'year' (2025) ou 'month' (2025-09)
+SHARDING_ENV = 'MIP_SHARDING'
+SHARD_TITLE_PATTERNS = {
+    'year': re.compile(r'^\d{4}$'),
+    'month': re.compile(r'^\d{4}-\d{2}$'),
+}
+
+# Máximo de abas lidas em paralelo
+MAX_FETCH_WORKERS = 8
+
+# Multiplicador do id estável das linhas em modo particionado (id = período * 100000 + linha)
+SHARD_ROW_ID_BASE = 100000
 
 
 class SheetManager:
@@ -11,23 +29,58 @@ class SheetManager:
     Suporta múltiplos métodos de autenticação com fallback automático:
     1. Streamlit Secrets (JSON Payload como string) - PRIORIDADE
     2. Arquivo local (Desenvolvimento)
+
+    Com `sharding='year'` ou `'month'` (ou MIP_SHARDING), cada ano/mês fica em
+    uma aba própria ("2025", "2025-09"), roteada pela coluna Data. Leituras buscam
+    em paralelo só as abas do período pedido; abas de períodos encerrados ficam
+    em cache permanente (invalidado pelas escritas feitas por este app).
     """
 
-    def __init__(self, sheet_name: str = 'Journal Database'):
+    # Cache compartilhado das abas imutáveis: (planilha, aba) -> DataFrame
+    _shard_cache: Dict[Tuple[str, str], pd.DataFrame] = {}
+
+    def __init__(self, sheet_name: str = 'Journal Database', lazy: bool = True,
+                 sharding: Optional[str] = None):
         """
         Inicializa o gerenciador de planilhas.
 
         Args:
             sheet_name: Nome da planilha no Google Drive
+            lazy: Se True, a autenticação só acontece no primeiro acesso aos dados
+                  (não atrasa a primeira renderização do app)
+            sharding: 'year', 'month' ou None (aba única). Padrão: variável MIP_SHARDING
         """
+        sharding = sharding if sharding is not None else (os.getenv(SHARDING_ENV) or None)
+        if sharding is not None and sharding not in SHARD_TITLE_PATTERNS:
+            raise ValueError(f"Particionamento inválido: {sharding} (use 'year' ou 'month')")
+
         self.sheet_name = sheet_name
+        self.sharding = sharding
         self.gc = None
-        self.sheet = None
+        self.spreadsheet = None
+        self._sheet = None
+        self._worksheets: Optional[Dict[str, Any]] = None
         self.credentials_source = None
-        self._connect()
+        if not lazy:
+            self._connect()
+
+    @property
+    def sheet(self):
+        """Worksheet ativa; conecta ao Google Sheets no primeiro acesso."""
+        if self._sheet is None:
+            self._connect()
+        return self._sheet
+
+    @sheet.setter
+    def sheet(self, value):
+        self._sheet = value
 
     def _connect(self):
         """Estabelece conexão com o Google Sheets."""
+        # Import sob demanda: gspread/google-auth pesam no cold start
+        import gspread
+        import streamlit as st
+
         print(f"\n{'='*60}")
         print(f"🔧 Iniciando conexão com Google Sheets...")
         print(f"📋 Planilha alvo: '{self.sheet_name}'")
@@ -35,8 +88,6 @@ class SheetManager:
 
         # Tentar 1: Streamlit Secrets (Cloud) - PRIORIDADE
         try:
-            import streamlit as st
-
             st.write("🔍 DEBUG: Buscando 'service_account_file_content' em st.secrets...")
             secret_value = st.secrets.get('service_account_file_content')
 
@@ -82,7 +133,8 @@ class SheetManager:
                 raise Exception(f"Erro ao conectar com gspread: {str(e)}")
 
             try:
-                self.sheet = self.gc.open(self.sheet_name).sheet1
+                self.spreadsheet = self.gc.open(self.sheet_name)
+                self.sheet = self.spreadsheet.sheet1
                 st.write("")
                 st.success(f"✅ CONECTADO via {self.credentials_source}")
                 st.info(f"📊 Planilha: '{self.sheet_name}'")
@@ -91,6 +143,8 @@ class SheetManager:
             except Exception as e:
                 st.error(f"❌ DEBUG: Erro ao abrir planilha: {str(e)}")
                 raise Exception(f"Erro ao abrir planilha: {str(e)}")
+        except Exception as e:
+            print(f"⚠️ Streamlit Secrets indisponível: {e}")
 
         # Tentar 2: Arquivo Local (Desenvolvimento)
         try:
@@ -105,7 +159,8 @@ class SheetManager:
                         st.write(f"✅ DEBUG: gspread.service_account() bem-sucedido")
 
                         try:
-                            self.sheet = self.gc.open(self.sheet_name).sheet1
+                            self.spreadsheet = self.gc.open(self.sheet_name)
+                            self.sheet = self.spreadsheet.sheet1
                             st.write("")
                             st.success(f"✅ CONECTADO via {self.credentials_source}")
                             st.info(f"📊 Planilha: '{self.sheet_name}'")
@@ -117,6 +172,8 @@ class SheetManager:
                     except Exception as e:
                         st.error(f"❌ DEBUG: Erro ao usar arquivo local: {str(e)}")
                         continue
+        except Exception as e:
+            print(f"⚠️ Erro ao ler credenciais locais: {e}")
 
         # Se chegou aqui, nenhum método funcionou
         st.write(f"\n{'='*60}")
@@ -150,18 +207,167 @@ class SheetManager:
         return {
             'sheet_name': self.sheet_name,
             'credentials_source': self.credentials_source or 'Não conectado',
-            'connection_status': '✅ Conectado' if self.sheet else '❌ Desconectado'
+            'connection_status': '✅ Conectado' if self._sheet else '❌ Desconectado'
         }
 
-    def get_data(self) -> pd.DataFrame:
+    # ==========================================
+    # PARTICIONAMENTO POR ANO/MÊS
+    # ==========================================
+
+    @staticmethod
+    def _parse_date(value) -> Optional[pd.Timestamp]:
+        """Converte a Data da planilha (DD/MM/YYYY ou ISO) em Timestamp."""
+        parsed = pd.to_datetime(value, dayfirst=True, errors='coerce')
+        return None if pd.isna(parsed) else parsed
+
+    def shard_title(self, value) -> str:
+        """Nome da aba que guarda a data informada ("2025" ou "2025-09")."""
+        parsed = self._parse_date(value)
+        if parsed is None:
+            raise ValueError(f"Data inválida para particionamento: {value}")
+        return f"{parsed.year}" if self.sharding == 'year' else f"{parsed.year}-{parsed.month:02d}"
+
+    def shard_bounds(self, title: str) -> Tuple[date, date]:
+        """Primeiro e último dia do período de uma aba."""
+        start = pd.Period(title, freq='Y' if self.sharding == 'year' else 'M')
+        return start.start_time.date(), start.end_time.date()
+
+    def _is_immutable(self, title: str) -> bool:
+        """Abas de períodos já encerrados não recebem mais registros novos."""
+        return self.shard_bounds(title)[1] < datetime.now().date()
+
+    def list_shards(self, refresh: bool = False) -> Dict[str, Any]:
+        """
+        Retorna as abas de partição existentes ({título: worksheet}).
+        A listagem é uma única chamada de metadados e fica em memória.
+        """
+        if self._worksheets is None or refresh:
+            if self.spreadsheet is None:
+                self._connect()
+            pattern = SHARD_TITLE_PATTERNS[self.sharding]
+            self._worksheets = {
+                ws.title: ws for ws in self.spreadsheet.worksheets() if pattern.match(ws.title)
+            }
+        return self._worksheets
+
+    def get_date_bounds(self) -> Tuple[date, date]:
+        """Intervalo de datas coberto pelas abas de partição (limitado a hoje)."""
+        today = datetime.now().date()
+        titles = sorted(self.list_shards())
+        if not titles:
+            return today, today
+        return self.shard_bounds(titles[0])[0], min(self.shard_bounds(titles[-1])[1], today)
+
+    def _get_or_create_shard(self, title: str):
+        """Worksheet da partição; cria a aba (com cabeçalho) se ainda não existir."""
+        shards = self.list_shards()
+        if title not in shards:
+            import streamlit as st
+            st.write(f"🔍 DEBUG: Criando aba '{title}'")
+            worksheet = self.spreadsheet.add_worksheet(title=title, rows=400, cols=len(COLUMNS))
+            worksheet.append_row(COLUMNS)
+            shards[title] = worksheet
+        return shards[title]
+
+    def _invalidate_shard(self, title: str):
+        self._shard_cache.pop((self.sheet_name, title), None)
+
+    def _fetch_shard(self, title: str) -> pd.DataFrame:
+        """Lê uma aba (executado nas threads do pool; sem chamadas ao Streamlit)."""
+        key = (self.sheet_name, title)
+        if key in self._shard_cache:
+            return self._shard_cache[key]
+
+        records = self.list_shards()[title].get_all_records()
+        df = pd.DataFrame(records) if records else pd.DataFrame(columns=COLUMNS)
+        df['_aba'] = title
+        df['_linha'] = range(1, len(df) + 1)  # Mesma convenção de update_cell/delete_row
+        period = int(title.replace('-', ''))
+        df.index = [period * SHARD_ROW_ID_BASE + row for row in df['_linha']]
+
+        if self._is_immutable(title):
+            self._shard_cache[key] = df
+        return df
+
+    def _get_sharded_data(self, start_date=None, end_date=None) -> pd.DataFrame:
+        """Busca em paralelo as abas que cruzam o período e junta os resultados."""
+        start = self._parse_date(start_date).date() if start_date is not None else date.min
+        end = self._parse_date(end_date).date() if end_date is not None else date.max
+
+        titles = [
+            title for title in sorted(self.list_shards())
+            if self.shard_bounds(title)[1] >= start and self.shard_bounds(title)[0] <= end
+        ]
+        if not titles:
+            return pd.DataFrame(columns=COLUMNS + ['_aba', '_linha'])
+
+        with ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(titles))) as pool:
+            frames = list(pool.map(self._fetch_shard, titles))
+        return pd.concat(frames)
+
+    def split_into_shards(self) -> Dict[str, int]:
         """
-        Retorna todos os dados da planilha como um DataFrame.
+        Migração: copia as linhas da aba principal (sheet1) para as abas de partição,
+        uma escrita em lote por aba. A aba principal não é alterada.
+
+        Abas de partição que já têm dados são puladas, então executar de novo
+        não duplica linhas (e registros gravados direto nas partições são mantidos).
 
         Returns:
-            DataFrame com os dados da planilha (colunas: Data, Mensagem Crua, Resposta)
+            Dict {aba: linhas copiadas} (0 para abas puladas)
+        """
+        import streamlit as st
+
+        values = self.sheet.get_all_values()
+        groups: Dict[str, List[list]] = {}
+        for row in values[1:]:
+            row = (row + [''] * len(COLUMNS))[:len(COLUMNS)]
+            try:
+                groups.setdefault(self.shard_title(row[0]), []).append(row)
+            except ValueError:
+                st.warning(f"⚠️ Linha ignorada (data inválida): {row[0]}")
+
+        copied = {}
+        existing = self.list_shards()
+        for title, rows in sorted(groups.items()):
+            # Coluna Data com algo além do cabeçalho = aba já migrada
+            if title in existing and len(existing[title].col_values(1)) > 1:
+                copied[title] = 0
+                st.write(f"⏭️ DEBUG: Aba '{title}' já tem dados, pulando")
+                continue
+
+            worksheet = self._get_or_create_shard(title)
+            worksheet.append_rows(rows, value_input_option='USER_ENTERED')
+            self._invalidate_shard(title)
+            copied[title] = len(rows)
+            st.write(f"✅ DEBUG: {len(rows)} linhas copiadas para a aba '{title}'")
+        return copied
+
+    # ==========================================
+    # LEITURA E ESCRITA
+    # ==========================================
+
+    def get_data(self, start_date=None, end_date=None) -> pd.DataFrame:
+        """
+        Retorna os dados da planilha como um DataFrame.
+
+        Args:
+            start_date: Início do período (só usado no modo particionado)
+            end_date: Fim do período (só usado no modo particionado)
+
+        Returns:
+            DataFrame com os dados da planilha (colunas: Data, Mensagem Crua, Resposta;
+            no modo particionado também _aba e _linha, com índice estável por linha)
         """
         try:
             import streamlit as st
+
+            if self.sharding:
+                st.write(f"🔍 DEBUG: Obtendo dados das abas ({self.sharding}) de {start_date} a {end_date}...")
+                df = self._get_sharded_data(start_date, end_date)
+                st.write(f"✅ DEBUG: {len(df)} registros encontrados em {df['_aba'].nunique()} aba(s)")
+                return df
+
             st.write("🔍 DEBUG: Obtendo dados da planilha...")
 
             # Obter todos os dados da planilha
@@ -194,6 +400,14 @@ class SheetManager:
         try:
             import streamlit as st
 
+            if self.sharding:
+                title = self.shard_title(date)
+                st.write(f"🔍 DEBUG: Adicionando dados na aba '{title}'")
+                self._get_or_create_shard(title).append_row([date, text, ""], value_input_option='USER_ENTERED')
+                self._invalidate_shard(title)
+                st.write(f"✅ Dados adicionados: {date}")
+                return True
+
             # Encontrar a próxima linha vazia
             next_row = len(self.sheet.get_all_values()) + 1
             st.write(f"🔍 DEBUG: Adicionando dados na linha {next_row}")
@@ -209,7 +423,25 @@ class SheetManager:
             st.error(f"❌ DEBUG: Erro ao adicionar dados: {type(e).__name__}: {str(e)}")
             raise Exception(f"Erro ao adicionar dados: {str(e)}")
 
-    def update_cell(self, row: int, col: int, value: str) -> bool:
+    def locate_row(self, row_id: int) -> Tuple[int, Optional[str]]:
+        """
+        Converte o índice de uma linha do DataFrame de get_data em (row, aba),
+        no formato esperado por update_cell/delete_row.
+        """
+        if not self.sharding:
+            return int(row_id) + 1, None  # Índice 0 = primeira linha de dados
+        period, row = divmod(int(row_id), SHARD_ROW_ID_BASE)
+        title = str(period) if self.sharding == 'year' else f"{str(period)[:4]}-{str(period)[4:]}"
+        return row, title
+
+    def _worksheet(self, shard: Optional[str]):
+        """Worksheet alvo de uma escrita: a aba da partição ou a aba principal."""
+        if shard is None:
+            return self.sheet
+        self._invalidate_shard(shard)
+        return self.list_shards()[shard]
+
+    def update_cell(self, row: int, col: int, value: str, shard: Optional[str] = None) -> bool:
         """
         Atualiza uma célula específica da planilha.
 
@@ -217,6 +449,7 @@ class SheetManager:
             row: Número da linha (1-indexado, incluindo cabeçalho)
             col: Número da coluna (1=A, 2=B, 3=C)
             value: Novo valor para a célula
+            shard: Aba da partição (coluna _aba), no modo particionado
 
         Returns:
             True se bem-sucedido
@@ -229,19 +462,48 @@ class SheetManager:
             actual_row = row + 1
 
             st.write(f"🔍 DEBUG: Atualizando célula: linha {actual_row}, coluna {col}")
-            self.sheet.update_cell(actual_row, col, value)
+            self._worksheet(shard).update_cell(actual_row, col, value)
             st.write(f"✅ Célula atualizada: linha {row}, coluna {col}")
             return True
         except Exception as e:
             st.error(f"❌ DEBUG: Erro ao atualizar célula: {type(e).__name__}: {str(e)}")
             raise Exception(f"Erro ao atualizar célula: {str(e)}")
 
-    def delete_row(self, row: int) -> bool:
+    def update_cells(self, cells: List[Tuple[int, int, str]], shard: Optional[str] = None) -> int:
+        """
+        Atualiza várias células de uma mesma aba em uma única requisição (batch_update).
+
+        Args:
+            cells: Lista de (row, col, valor), com row no mesmo formato de update_cell
+            shard: Aba da partição (coluna _aba), no modo particionado
+
+        Returns:
+            Número de células atualizadas
+        """
+        if not cells:
+            return 0
+        try:
+            import streamlit as st
+            from gspread.utils import rowcol_to_a1
+
+            st.write(f"🔍 DEBUG: Atualizando {len(cells)} célula(s) em lote")
+            self._worksheet(shard).batch_update(
+                [{'range': rowcol_to_a1(row + 1, col), 'values': [[value]]} for row, col, value in cells],
+                value_input_option='USER_ENTERED'
+            )
+            st.write(f"✅ {len(cells)} célula(s) atualizada(s)")
+            return len(cells)
+        except Exception as e:
+            st.error(f"❌ DEBUG: Erro ao atualizar células: {type(e).__name__}: {str(e)}")
+            raise Exception(f"Erro ao atualizar células: {str(e)}")
+
+    def delete_row(self, row: int, shard: Optional[str] = None) -> bool:
         """
         Deleta uma linha específica da planilha.
 
         Args:
             row: Número da linha (1-indexado, excluindo cabeçalho)
+            shard: Aba da partição (coluna _aba), no modo particionado
 
         Returns:
             True se bem-sucedido
@@ -252,7 +514,7 @@ class SheetManager:
             # Ajustar row para considerar o cabeçalho
             actual_row = row + 1
             st.write(f"🔍 DEBUG: Deletando linha {actual_row}")
-            self.sheet.delete_rows(actual_row)
+            self._worksheet(shard).delete_rows(actual_row)
             st.write(f"✅ Linha deletada: {row}")
             return True
         except Exception as e:
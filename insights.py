@@ -0,0 +1,171 @@
+# coding: utf-8
+import math
+from collections import OrderedDict
+from typing import FrozenSet, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Métricas comparadas entre segmentos: coluna -> (descrição no texto, é percentual?)
+METRICS = {
+    'Sono (horas)': ('seu sono', False),
+    'Sentimento (1-10)': ('seu sentimento', False),
+    'Treino': ('sua consistência de treino', True),
+    'Meditação': ('sua frequência de meditação', True),
+    'Leitura': ('sua frequência de leitura', True),
+    'Dieta': ('sua frequência de dieta', True),
+}
+
+MIN_SEGMENT_DAYS = 3     # Segmentos com menos dias são ignorados
+MIN_RELATIVE_DELTA = 0.1  # Variações abaixo de 10% não viram insight
+CACHE_SIZE = 32
+
+MONTH_NAMES = ['jan', 'fev', 'mar', 'abr', 'mai', 'jun', 'jul', 'ago', 'set', 'out', 'nov', 'dez']
+
+_cache: 'OrderedDict[tuple, List[str]]' = OrderedDict()
+
+
+def _segment_keys(df: pd.DataFrame, start, end) -> pd.DataFrame:
+    """
+    Monta uma coluna de chave de segmento por dimensão (NaN = fora do segmento).
+    Com período selecionado, só as linhas de [start, end] entram nos segmentos;
+    o período anterior aparece apenas na dimensão 'periodo'.
+    """
+    dates = pd.to_datetime(df['Data'], errors='coerce')
+    keys = pd.DataFrame(index=df.index)
+
+    in_period = pd.Series(True, index=df.index)
+    if start is not None and end is not None:
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        in_period = (dates >= start) & (dates <= end)
+    dated = dates.notna() & in_period
+
+    keys['geral'] = pd.Series('todos', index=df.index).where(in_period)
+    keys['dia_semana'] = pd.Series(np.where(dates.dt.dayofweek >= 5, 'fds', 'semana'), index=df.index).where(dated)
+    keys['mes'] = dates.dt.to_period('M').astype(str).where(dated)
+
+    if 'Tipo Treino' in df.columns:
+        keys['tipo_treino'] = df['Tipo Treino'].where(df['Tipo Treino'].astype(bool) & in_period)
+
+    if start is not None and end is not None:
+        length = end - start + pd.Timedelta(days=1)
+        keys['periodo'] = None
+        keys.loc[in_period, 'periodo'] = 'atual'
+        keys.loc[(dates >= start - length) & (dates < start), 'periodo'] = 'anterior'
+
+    return keys
+
+
+def compute_segment_aggregates(df: pd.DataFrame, start=None, end=None) -> pd.DataFrame:
+    """
+    Calcula média e contagem de todas as métricas para todos os segmentos
+    em uma única agregação agrupada.
+
+    Args:
+        df: DataFrame processado (histórico completo)
+        start: Início do período selecionado (para comparar com o período anterior)
+        end: Fim do período selecionado
+
+    Returns:
+        DataFrame indexado por (dimensao, segmento) com colunas (métrica, mean|count)
+    """
+    metrics = [m for m in METRICS if m in df.columns]
+    values = df[metrics].astype(float)
+    if 'Sono (horas)' in values.columns:
+        # 0.0 indica que o parser não encontrou sono
+        values['Sono (horas)'] = values['Sono (horas)'].where(values['Sono (horas)'] > 0)
+
+    keys = _segment_keys(df, start, end)
+    long_keys = keys.stack().rename('segmento').reset_index(level=1).rename(columns={'level_1': 'dimensao'})
+    long_frame = long_keys.join(values)
+
+    return long_frame.groupby(['dimensao', 'segmento']).agg(['mean', 'count'])
+
+
+def _compare(
+    aggregates: pd.DataFrame, dimension: str, segment: str, baseline: Tuple[str, str], context: str,
+    exclude: FrozenSet[str] = frozenset()
+) -> list:
+    """Gera candidatos (peso, texto) comparando um segmento com uma referência (exceto as métricas em `exclude`)."""
+    if (dimension, segment) not in aggregates.index or baseline not in aggregates.index:
+        return []
+
+    row = aggregates.loc[(dimension, segment)]
+    base = aggregates.loc[baseline]
+    candidates = []
+
+    for metric, (label, _) in METRICS.items():
+        if metric in exclude or metric not in aggregates.columns.get_level_values(0):
+            continue
+        n, n_base = row[(metric, 'count')], base[(metric, 'count')]
+        mean, mean_base = row[(metric, 'mean')], base[(metric, 'mean')]
+        if n < MIN_SEGMENT_DAYS or n_base < MIN_SEGMENT_DAYS or not mean_base or pd.isna(mean):
+            continue
+
+        delta = (mean - mean_base) / mean_base
+        if abs(delta) < MIN_RELATIVE_DELTA:
+            continue
+
+        verb = 'subiu' if delta > 0 else 'caiu'
+        text = f"{label.capitalize()} {verb} {abs(delta) * 100:.0f}% {context}"
+        weight = abs(delta) * math.sqrt(min(n, n_base))
+        candidates.append((weight, text))
+
+    return candidates
+
+
+def _month_label(period: str) -> str:
+    year, month = period.split('-')
+    return f"{MONTH_NAMES[int(month) - 1]}/{year[2:]}"
+
+
+def rank_insights(aggregates: pd.DataFrame, top_n: int = 3) -> List[str]:
+    """Compara os segmentos, ordena as variações significativas e retorna as N maiores em texto."""
+    candidates = []
+    candidates += _compare(aggregates, 'dia_semana', 'fds', ('dia_semana', 'semana'), 'no fds')
+    candidates += _compare(aggregates, 'periodo', 'atual', ('periodo', 'anterior'), 'em relação ao período anterior')
+
+    if 'mes' in aggregates.index.get_level_values(0):
+        months = sorted(aggregates.loc['mes'].index)
+        if len(months) >= 2:
+            current, previous = months[-1], months[-2]
+            candidates += _compare(
+                aggregates, 'mes', current, ('mes', previous),
+                f"em {_month_label(current)} vs. {_month_label(previous)}"
+            )
+
+    if 'tipo_treino' in aggregates.index.get_level_values(0):
+        for workout_type in aggregates.loc['tipo_treino'].index:
+            # Nos dias com tipo de treino, Treino é sempre verdadeiro: comparar não informa nada
+            candidates += _compare(
+                aggregates, 'tipo_treino', workout_type, ('geral', 'todos'),
+                f"nos dias de {workout_type} (vs. média geral)", exclude=frozenset({'Treino'})
+            )
+
+    candidates.sort(key=lambda c: c[0], reverse=True)
+    return [text for _, text in candidates[:top_n]]
+
+
+def get_segment_insights(df: pd.DataFrame, data_version: str, start=None, end=None, top_n: int = 3) -> List[str]:
+    """
+    Retorna os principais insights de comparação entre segmentos.
+    O resultado é memorizado por versão dos dados e período, então reruns não recalculam nada.
+
+    Args:
+        df: DataFrame processado (histórico completo)
+        data_version: Identificador da versão dos dados (muda quando a planilha muda)
+        start: Início do período selecionado
+        end: Fim do período selecionado
+        top_n: Quantidade de insights retornados
+    """
+    key = (data_version, str(start), str(end), top_n)
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+
+    insights = [] if df.empty else rank_insights(compute_segment_aggregates(df, start, end), top_n)
+
+    _cache[key] = insights
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return insights
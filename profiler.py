@@ -0,0 +1,137 @@
+# coding: utf-8
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+from typing import Callable, Optional
+
+import streamlit as st
+
+# MIP_PROFILE=1 perfila todos os reruns (ex: ambiente local)
+PROFILE_ENV = 'MIP_PROFILE'
+# MIP_PROFILE_TOKEN=<segredo> habilita por sessão com ?profile=<segredo> na URL (admins)
+PROFILE_TOKEN_ENV = 'MIP_PROFILE_TOKEN'
+PROFILE_QUERY_PARAM = 'profile'
+
+PROFILE_DIR = os.getenv('MIP_PROFILE_DIR', 'profiles')
+TOP_N = 25
+
+# Uma sessão perfilada por vez (o profiler do Python é global no processo)
+_profile_lock = threading.Lock()
+
+
+def _profile_token() -> Optional[str]:
+    """Token de admin: variável de ambiente ou Streamlit Secrets."""
+    token = os.getenv(PROFILE_TOKEN_ENV)
+    if token:
+        return token
+    try:
+        return st.secrets.get('profile_token')
+    except Exception:
+        return None  # Sem secrets.toml (ambiente local)
+
+
+def profiling_enabled() -> bool:
+    """Indica se este rerun deve ser perfilado."""
+    if os.getenv(PROFILE_ENV) == '1':
+        return True
+
+    token = _profile_token()
+    if not token:
+        return False
+    return st.query_params.get(PROFILE_QUERY_PARAM) == token
+
+
+def _session_id() -> str:
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        if ctx is not None:
+            return ctx.session_id
+    except Exception:
+        pass
+    return 'local'
+
+
+def save_profile(profiler: cProfile.Profile) -> str:
+    """
+    Salva o perfil (formato pstats) com nome único por sessão e rerun.
+    Abrir com: python -m pstats <arquivo> ou snakeviz <arquivo>
+
+    Returns:
+        Caminho do arquivo salvo
+    """
+    run = st.session_state.get('_profile_run', 0) + 1
+    st.session_state['_profile_run'] = run
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    file_name = f"{_session_id()[:8]}_rerun{run:04d}_{time.strftime('%Y%m%d-%H%M%S')}.prof"
+    path = os.path.join(PROFILE_DIR, file_name)
+    profiler.dump_stats(path)
+    return path
+
+
+def profile_summary(profiler: cProfile.Profile, top_n: int = TOP_N) -> str:
+    """Top N funções por tempo acumulado, em texto."""
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.strip_dirs().sort_stats('cumulative').print_stats(top_n)
+    return stream.getvalue()
+
+
+def run_with_profiling(main: Callable[[], None]):
+    """
+    Executa `main()` e, se o profiling estiver habilitado, captura o rerun inteiro
+    com cProfile, salva o arquivo e mostra um resumo em um expander.
+
+    O cProfile é global no processo (sys.monitoring no Python 3.12+): só uma sessão é
+    perfilada por vez e as demais rodam sem profiling.
+    """
+    if not profiling_enabled():
+        main()
+        return
+
+    if not _profile_lock.acquire(blocking=False):
+        main()  # Outra sessão está sendo perfilada
+        return
+
+    try:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # "Another profiling tool is already active" (outra ferramenta fora deste módulo)
+            print(f"⚠️ Profiling indisponível neste rerun: {e}")
+            main()
+            return
+
+        start = time.perf_counter()
+        try:
+            main()
+        except BaseException:
+            # st.rerun()/st.stop() usam exceções de controle: salvar o perfil mesmo assim,
+            # sem deixar um erro de disco substituir a exceção original
+            profiler.disable()
+            try:
+                save_profile(profiler)
+            except OSError as e:
+                print(f"⚠️ Não foi possível salvar o perfil: {e}")
+            raise
+        profiler.disable()
+    finally:
+        _profile_lock.release()
+
+    elapsed = time.perf_counter() - start
+
+    try:
+        path = save_profile(profiler)
+    except OSError as e:
+        st.warning(f"⚠️ Não foi possível salvar o perfil: {e}")
+        path = None
+
+    with st.expander(f"⏱️ Profiling: rerun em {elapsed:.2f}s"):
+        if path:
+            st.caption(f"Perfil salvo em `{path}`")
+        st.code(profile_summary(profiler), language='text')
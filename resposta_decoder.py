@@ -0,0 +1,171 @@
+# coding: utf-8
+import hashlib
+import re
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+
+from search_index import normalize_text
+
+# Perguntas do journal gerado pela IA (normalizadas, sem acento/pontuação) -> seção
+QUESTIONS = {
+    'o que estou mais grato hoje': 'gratidao',
+    'exercitei meu corpo hoje': 'exercicio',
+    'o que fiz hoje': 'dia',
+    'o que fiz para ajudar outras pessoas hoje': 'ajuda',
+    'o que fiz pela minha familia ou por outras pessoas hoje': 'ajuda',
+    'quanto gastei hoje': 'gasto',
+    'o que aprendi hoje': 'aprendizado',
+    'o que me deixou feliz hoje': 'felicidade',
+    'o que posso melhorar amanha': 'melhorar',
+    'tarefas a fazer para amanha': 'tarefas',
+}
+EXPECTED_SECTIONS = frozenset(QUESTIONS.values())
+
+# Hábitos detectados nas respostas (regex sobre texto normalizado)
+HABIT_PATTERNS = {
+    'IA Treino': re.compile(r'\b(?:trein\w*|academia|corri\w*|musculacao|exercit\w*|caminhada|futebol)\b'),
+    'IA Meditação': re.compile(r'\b(?:medit\w*|mindfulness)\b'),
+    'IA Leitura': re.compile(r'\b(?:li|livro\w*|leitura|lendo|biblia)\b'),
+}
+
+# Tags de assunto (o registro recebe a tag se alguma palavra aparecer)
+TAG_PATTERNS = {
+    'trabalho': re.compile(r'\b(?:reuni\w*|cliente\w*|projeto\w*|proposta\w*|consultoria|contrato\w*)\b'),
+    'estudo': re.compile(r'\b(?:aula\w*|curso\w*|estud\w*|professor\w*)\b'),
+    'espiritualidade': re.compile(r'\b(?:biblia|oracao|igreja|deus|missa)\b'),
+    'família': re.compile(r'\b(?:familia|filh\w*|esposa|marido|pai|mae|irma\w*)\b'),
+    'saúde': re.compile(r'\b(?:medic\w*|dor|doente|gripe|sauna|suplement\w*)\b'),
+    'lazer': re.compile(r'\b(?:filme|serie|jantar|viagem|ferias|praia|futebol)\b'),
+}
+
+_MONEY_RE = re.compile(
+    r'r\$\s*(\d{1,3}(?:\.\d{3})+(?:,\d{1,2})?|\d+(?:,\d{1,2})?)'
+    r'|(\d+(?:,\d{1,2})?)\s*reais\b'
+)
+_QUESTION_LINE_RE = re.compile(r'^[\s*#>-]*(.+?\?)[\s*]*$')
+
+# Colunas tipadas produzidas pelo decoder
+DECODED_COLUMNS = {
+    'IA Exercitou': 'boolean',
+    'IA Gasto (R$)': 'float',
+    'IA Completude (%)': 'float',
+    'IA Tags': 'object',
+    'IA Treino': 'boolean',
+    'IA Meditação': 'boolean',
+    'IA Leitura': 'boolean',
+}
+
+CACHE_SIZE = 20000
+_cache: 'OrderedDict[str, dict]' = OrderedDict()
+
+
+def _question_key(line: str) -> Optional[str]:
+    match = _QUESTION_LINE_RE.match(line)
+    if not match:
+        return None
+    question = re.sub(r'[^\w\s]', '', normalize_text(match.group(1))).strip()
+    return QUESTIONS.get(question)
+
+
+def split_sections(text: str) -> Dict[str, str]:
+    """Divide a Resposta em {seção: texto da resposta} a partir das perguntas do journal."""
+    sections: Dict[str, list] = {}
+    current = None
+    for line in text.splitlines():
+        key = _question_key(line)
+        if key is not None:
+            current = key
+            sections.setdefault(current, [])
+        elif current is not None and line.strip() and line.strip() != '---':
+            sections[current].append(line.strip().lstrip('-').strip())
+    return {key: '\n'.join(lines) for key, lines in sections.items()}
+
+
+def _parse_money(text: str) -> Optional[float]:
+    amounts = [
+        float((value or alt).replace('.', '').replace(',', '.'))
+        for value, alt in _MONEY_RE.findall(normalize_text(text))
+    ]
+    return round(sum(amounts), 2) if amounts else None
+
+
+def decode_resposta(text: str) -> dict:
+    """
+    Decodifica uma Resposta (journal gerado pela IA) em valores tipados.
+
+    Returns:
+        Dict com as chaves de DECODED_COLUMNS (None quando a informação não existe)
+    """
+    result = {column: None for column in DECODED_COLUMNS}
+    if not isinstance(text, str) or not text.strip():
+        return result
+
+    sections = split_sections(text)
+    answered = {key for key, answer in sections.items() if answer}
+    result['IA Completude (%)'] = round(100 * len(answered & EXPECTED_SECTIONS) / len(EXPECTED_SECTIONS), 1)
+
+    exercise = normalize_text(sections.get('exercicio', '')).lstrip()
+    if exercise.startswith('sim'):
+        result['IA Exercitou'] = True
+    elif exercise.startswith(('nao', 'no ')):
+        result['IA Exercitou'] = False
+
+    if 'gasto' in sections:
+        result['IA Gasto (R$)'] = _parse_money(sections['gasto'])
+
+    # Sem as seções do dia, procurar no texto inteiro (Resposta fora do formato de perguntas)
+    answers = ' '.join(sections.get(key, '') for key in ('dia', 'exercicio', 'aprendizado', 'felicidade'))
+    normalized = normalize_text(answers if answers.strip() else text)
+    for column, pattern in HABIT_PATTERNS.items():
+        result[column] = bool(pattern.search(normalized))
+
+    tags = [tag for tag, pattern in TAG_PATTERNS.items() if pattern.search(normalized)]
+    result['IA Tags'] = ', '.join(tags)
+    return result
+
+
+def _content_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=12).hexdigest()
+
+
+def decode_cached(text) -> dict:
+    """decode_resposta memorizado pelo hash do conteúdo (textos repetidos/inalterados não são reprocessados)."""
+    if not isinstance(text, str) or not text.strip():
+        return decode_resposta(text)
+
+    key = _content_hash(text)
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+
+    decoded = decode_resposta(text)
+    _cache[key] = decoded
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return decoded
+
+
+def decode_resposta_columns(df: pd.DataFrame, rows: Optional[Iterable] = None) -> pd.DataFrame:
+    """
+    Decodifica a coluna Resposta só para as linhas pedidas.
+
+    Args:
+        df: DataFrame com a coluna 'Resposta'
+        rows: Índices das linhas a decodificar (padrão: todas as linhas de df)
+
+    Returns:
+        DataFrame com as colunas de DECODED_COLUMNS, indexado pelas linhas decodificadas
+    """
+    index = df.index if rows is None else pd.Index(list(rows)).intersection(df.index)
+    if 'Resposta' not in df.columns or len(index) == 0:
+        return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in DECODED_COLUMNS.items()}, index=index)
+
+    decoded = pd.DataFrame([decode_cached(text) for text in df.loc[index, 'Resposta']], index=index)
+    return decoded.astype(DECODED_COLUMNS)
+
+
+def with_resposta_metrics(df: pd.DataFrame) -> pd.DataFrame:
+    """Retorna uma cópia de df com as colunas da IA (decodifica só as linhas de df)."""
+    return df.join(decode_resposta_columns(df))
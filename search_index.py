@@ -0,0 +1,357 @@
+# coding: utf-8
+import bisect
+import hashlib
+import os
+import pickle
+import re
+import unicodedata
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+
+# Diretório do cache local (índice de busca e afins)
+CACHE_DIR = '.cache'
+INDEX_FILE = os.path.join(CACHE_DIR, 'search_index.pkl')
+INDEX_VERSION = 2
+
+# Colunas de texto indexadas
+TEXT_COLUMNS = ('Mensagem Crua', 'Resposta')
+
+_TOKEN_RE = re.compile(r'\w+')
+_QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+# Palavras muito frequentes em português que não ajudam na busca
+STOPWORDS = frozenset({
+    'a', 'ao', 'aos', 'as', 'com', 'da', 'das', 'de', 'do', 'dos', 'e', 'ela',
+    'ele', 'em', 'eu', 'foi', 'isso', 'ja', 'lhe', 'mais', 'mas', 'me', 'meu',
+    'minha', 'na', 'nas', 'no', 'nos', 'o', 'os', 'ou', 'para', 'pela', 'pelo',
+    'por', 'pra', 'que', 'se', 'sem', 'seu', 'sua', 'um', 'uma', 'umas', 'uns',
+})
+
+
+def normalize_text(text: str) -> str:
+    """Remove acentos e converte para minúsculas ("Meditação" -> "meditacao")."""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def stem(token: str) -> str:
+    """
+    Redução leve de plural em português (já sem acentos).
+    Ex: "treinos" -> "treino", "reunioes" -> "reuniao", "jornais" -> "jornal"
+    """
+    if len(token) <= 3:
+        return token
+    if token.endswith(('oes', 'aes')):
+        return token[:-3] + 'ao'
+    if token.endswith('ais'):
+        return token[:-2] + 'l'
+    if token.endswith('eis') and len(token) > 4:
+        return token[:-3] + 'el'
+    if token.endswith('ns'):
+        return token[:-2] + 'm'
+    if token.endswith('s') and not token.endswith(('ss', 'us', 'is')):
+        return token[:-1]
+    return token
+
+
+def _tokenize_words(text: str) -> List[Tuple[int, str, str]]:
+    """Como `tokenize`, mas retorna (posição, palavra normalizada, termo)."""
+    if not isinstance(text, str) or not text:
+        return []
+
+    tokens = []
+    for position, match in enumerate(_TOKEN_RE.finditer(normalize_text(text))):
+        word = match.group(0)
+        if word in STOPWORDS:
+            continue
+        tokens.append((position, word, stem(word)))
+    return tokens
+
+
+def tokenize(text: str) -> List[Tuple[int, str]]:
+    """
+    Quebra o texto em termos normalizados.
+    Retorna lista de (posição, termo); stopwords ocupam posição mas não são retornadas.
+    """
+    return [(position, term) for position, _, term in _tokenize_words(text)]
+
+
+def _to_date(value) -> Optional[date]:
+    """Converte valores da coluna Data para date (ou None)."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    parsed = pd.to_datetime(value, dayfirst=True, errors='coerce')
+    return None if pd.isna(parsed) else parsed.date()
+
+
+class JournalSearchIndex:
+    """Índice invertido sobre 'Mensagem Crua' e 'Resposta'.
+
+    Cada termo aponta para {row_id: [posições]}, o que permite consultas por
+    termo, prefixo ("medit*") e frase ("noite de sono"), com filtro de data.
+    O índice é atualizado incrementalmente via `sync` e persistido em disco.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[int, List[int]]] = {}
+        self.row_terms: Dict[int, Set[str]] = {}
+        self.row_dates: Dict[int, Optional[date]] = {}
+        self.fingerprints: Dict[int, str] = {}
+        # Palavra sem redução de plural -> termo indexado (para buscas por prefixo)
+        self.words: Dict[str, str] = {}
+        self._sorted_terms: Optional[List[str]] = None
+        self._sorted_words: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self.fingerprints)
+
+    # ------------------------------------------
+    # Construção
+    # ------------------------------------------
+
+    @staticmethod
+    def _fingerprint(row_date, texts: Iterable) -> str:
+        digest = hashlib.blake2b(digest_size=8)
+        for value in (row_date, *texts):
+            digest.update(str(value).encode('utf-8'))
+            digest.update(b'\x00')
+        return digest.hexdigest()
+
+    def add_row(self, row_id: int, row_date, texts: Iterable[str]):
+        """
+        Indexa (ou reindexa) uma linha.
+
+        Args:
+            row_id: Identificador estável da linha (índice do DataFrame)
+            row_date: Data do registro
+            texts: Textos das colunas indexadas
+        """
+        texts = list(texts)
+        if row_id in self.fingerprints:
+            self.remove_row(row_id)
+
+        terms = set()
+        offset = 0
+        for text in texts:
+            tokens = _tokenize_words(text)
+            for position, word, term in tokens:
+                self.postings.setdefault(term, {}).setdefault(row_id, []).append(offset + position)
+                terms.add(term)
+                if word not in self.words:
+                    self.words[word] = term
+                    self._sorted_words = None
+            # Separar colunas para que frases não cruzem de uma para outra
+            offset += (tokens[-1][0] + 2) if tokens else 1
+
+        self.row_terms[row_id] = terms
+        self.row_dates[row_id] = _to_date(row_date)
+        self.fingerprints[row_id] = self._fingerprint(row_date, texts)
+        self._sorted_terms = None
+
+    def remove_row(self, row_id: int):
+        """Remove uma linha do índice."""
+        for term in self.row_terms.pop(row_id, ()):
+            rows = self.postings.get(term)
+            if rows is None:
+                continue
+            rows.pop(row_id, None)
+            if not rows:
+                del self.postings[term]
+        self.row_dates.pop(row_id, None)
+        self.fingerprints.pop(row_id, None)
+        self._sorted_terms = None
+
+    def sync(self, df: pd.DataFrame, remove_missing: bool = True) -> int:
+        """
+        Sincroniza o índice com o DataFrame, reindexando apenas linhas novas,
+        alteradas ou removidas.
+
+        Args:
+            df: DataFrame com as colunas de texto (índice = row_id)
+            remove_missing: Remove do índice as linhas ausentes de df. Use False quando
+                df é só uma parte do histórico (modo particionado, um intervalo de datas)
+
+        Returns:
+            Número de linhas modificadas no índice
+        """
+        columns = [c for c in TEXT_COLUMNS if c in df.columns]
+        dates = df['Data'] if 'Data' in df.columns else pd.Series(None, index=df.index)
+
+        changed = 0
+        seen = set()
+        for row_id, row_date, *texts in zip(df.index, dates, *(df[c] for c in columns)):
+            seen.add(row_id)
+            if self.fingerprints.get(row_id) != self._fingerprint(row_date, texts):
+                self.add_row(row_id, row_date, texts)
+                changed += 1
+
+        if not remove_missing:
+            return changed
+
+        for row_id in [r for r in self.fingerprints if r not in seen]:
+            self.remove_row(row_id)
+            changed += 1
+
+        return changed
+
+    # ------------------------------------------
+    # Consulta
+    # ------------------------------------------
+
+    @staticmethod
+    def _prefix_matches(sorted_keys: List[str], prefix: str) -> List[str]:
+        start = bisect.bisect_left(sorted_keys, prefix)
+        matches = []
+        for key in sorted_keys[start:]:
+            if not key.startswith(prefix):
+                break
+            matches.append(key)
+        return matches
+
+    def _prefix_rows(self, prefix: str) -> Set[int]:
+        """
+        Linhas com termos que começam com o prefixo. O prefixo é comparado com
+        os termos indexados (com plural reduzido) e com as palavras originais,
+        então "treinos*" e "reunioe*" também encontram "treino" e "reuniao".
+        """
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self.postings)
+        if self._sorted_words is None:
+            self._sorted_words = sorted(self.words)
+
+        terms = set(self._prefix_matches(self._sorted_terms, stem(prefix)))
+        terms.update(self.words[word] for word in self._prefix_matches(self._sorted_words, prefix))
+
+        rows = set()
+        for term in terms:
+            rows.update(self.postings.get(term, ()))
+        return rows
+
+    def _phrase_rows(self, phrase: str) -> Set[int]:
+        tokens = tokenize(phrase)
+        if not tokens:
+            return set()
+
+        first_pos, first_term = tokens[0]
+        candidates = self._term_rows(first_term)
+        for _, term in tokens[1:]:
+            candidates &= self._term_rows(term)
+
+        rows = set()
+        for row_id in candidates:
+            starts = self.postings[first_term][row_id]
+            for start in starts:
+                if all(
+                    (start + pos - first_pos) in self.postings[term][row_id]
+                    for pos, term in tokens[1:]
+                ):
+                    rows.add(row_id)
+                    break
+        return rows
+
+    def _term_rows(self, term: str) -> Set[int]:
+        return set(self.postings.get(term, ()))
+
+    def search(self, query: str, start_date=None, end_date=None) -> Set[int]:
+        """
+        Busca linhas que contêm todos os termos da consulta.
+
+        Sintaxe:
+            treino leitura      -> ambos os termos (E lógico)
+            medit*              -> termos que começam com "medit"
+            "noite de sono"     -> frase exata (ignorando acentos)
+
+        Args:
+            query: Texto da busca
+            start_date: Data inicial (inclusive), opcional
+            end_date: Data final (inclusive), opcional
+
+        Returns:
+            Conjunto de row_ids (índices do DataFrame) encontrados
+        """
+        result: Optional[Set[int]] = None
+
+        for phrase, word in _QUERY_RE.findall(query or ''):
+            if phrase:
+                rows = self._phrase_rows(phrase)
+            elif word.endswith('*'):
+                prefix = normalize_text(word.rstrip('*'))
+                if not prefix:
+                    continue
+                rows = self._prefix_rows(prefix)
+            else:
+                tokens = tokenize(word)
+                if not tokens:
+                    continue  # Apenas stopwords
+                rows = self._term_rows(tokens[0][1])
+                for _, term in tokens[1:]:
+                    rows &= self._term_rows(term)
+
+            result = rows if result is None else result & rows
+            if not result:
+                return set()
+
+        if result is None:
+            result = set(self.fingerprints)
+
+        start = _to_date(start_date)
+        end = _to_date(end_date)
+        if start or end:
+            result = {
+                row_id for row_id in result
+                if self.row_dates.get(row_id) is not None
+                and (start is None or self.row_dates[row_id] >= start)
+                and (end is None or self.row_dates[row_id] <= end)
+            }
+
+        return result
+
+    # ------------------------------------------
+    # Persistência
+    # ------------------------------------------
+
+    def save(self, path: str = INDEX_FILE):
+        """Salva o índice no cache local."""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        state = {
+            'version': INDEX_VERSION,
+            'postings': self.postings,
+            'row_terms': self.row_terms,
+            'row_dates': self.row_dates,
+            'fingerprints': self.fingerprints,
+            'words': self.words,
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = INDEX_FILE) -> 'JournalSearchIndex':
+        """Carrega o índice do cache local; retorna um índice vazio se não existir ou for inválido."""
+        index = cls()
+        if not os.path.exists(path):
+            return index
+
+        try:
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+        except Exception as e:
+            print(f"⚠️ Índice de busca inválido, reconstruindo: {e}")
+            return index
+
+        if state.get('version') != INDEX_VERSION:
+            return index
+
+        index.postings = state['postings']
+        index.row_terms = state['row_terms']
+        index.row_dates = state['row_dates']
+        index.fingerprints = state['fingerprints']
+        index.words = state['words']
+        return index
@@ -0,0 +1,283 @@
+# coding: utf-8
+import re
+from typing import List, NamedTuple, Optional
+
+import pandas as pd
+
+# Distância máxima (em caracteres) entre a palavra-chave e o horário/duração
+MAX_KEYWORD_GAP = 40
+
+# Duração máxima plausível de uma noite de sono
+MAX_SLEEP_HOURS = 16
+
+# Noites com confiança menor que isso não entram no total de horas
+MIN_CONFIDENCE = 0.5
+
+# Palavras-chave de sono/vigília e "sono" (âncora das durações explícitas).
+# Só os trechos logo após cada âncora são tokenizados com o padrão completo.
+# "dormi 7h30" é duração; "fui dormir 11h", "deitei 10h30" são horários de dormir
+SLEPT_KEYWORDS = ('dormi', 'durmo', 'slept')
+SLEEP_KEYWORDS = ('dormir', 'deitei', 'deitar', 'adormeci', 'sleep', 'went to bed')
+WAKE_KEYWORDS = ('acordei', 'acordar', 'acordo', 'despertei', 'levantei', 'woke', 'wake')
+_ANCHOR_KIND = {
+    **{word: 'slept' for word in SLEPT_KEYWORDS},
+    **{word: 'sleep' for word in SLEEP_KEYWORDS},
+    **{word: 'wake' for word in WAKE_KEYWORDS},
+    'sono': 'sono',
+}
+
+
+def _trie_pattern(words) -> str:
+    """Alternação em forma de árvore de prefixos ("dorm(?:i(?:r)?)"), bem mais rápida que "dormi|dormir|..."."""
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: dict) -> str:
+        branches = [
+            (r'\s+' if char == ' ' else re.escape(char)) + build(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if not branches:
+            return ''
+        if len(branches) == 1 and '' not in node:
+            return branches[0]
+        return '(?:%s)%s' % ('|'.join(branches), '?' if '' in node else '')
+
+    return build(trie)
+
+
+# Sem \b inicial, grupos nomeados nem IGNORECASE (bem mais rápido): minúsculas e
+# "Capitalizadas" entram na árvore; a fronteira inicial é checada em _anchors
+_ANCHOR_RE = re.compile(_trie_pattern([*_ANCHOR_KIND, *(word.capitalize() for word in _ANCHOR_KIND)]) + r'\b')
+
+# Duração explícita terminando em "sono" ("8 horas de sono", "7h30 de sono")
+_SONO_DURATION_RE = re.compile(r"""
+    \b(?P<dur_h>\d{1,2}(?:[.,]\d+)?)\s*(?:horas?|hrs?|hours?|h)
+    (?:\s*(?:e\s*)?(?P<dur_m>\d{1,2})\s*(?:min|minutos?)?)?
+    \s+(?:de\s+)?sono$
+""", re.IGNORECASE | re.VERBOSE)
+SONO_LOOKBEHIND = 30
+
+# Tokens no trecho após uma palavra-chave: a ordem das alternativas define a prioridade.
+# O lookahead inicial descarta rapidamente posições que não podem iniciar um token.
+_VALUE_RE = re.compile(r"""
+    (?=[\dàaclmpu.;!?\n])
+    (?:
+    (?P<duration>\b(?P<dur_h>\d{1,2}(?:[.,]\d+)?)\s*(?:horas?|hrs?|hours?)\b
+        (?:\s*(?:e\s*)?(?P<dur_m>\d{1,2})\s*(?:min|minutos?)\b)?
+        (?P<dur_sono>\s+(?:de\s+)?sono)?)
+  | (?P<clock>
+        (?P<prep>(?:
+            (?P<until>\b(?:até|ate)\s+)
+          | (?P<approx>\b(?:cerca\s+d[ae]s?|umas)\s+)
+          | \b(?:às|as|at|ali(?:\s+pelas)?|l[áa]\s+pelas|por\s+volta\s+d[ae]s?|perto\s+d[ae]s?)\s+
+        )(?:(?:umas|[àa]s)\s+)?)?
+        (?:(?P<midnight>\bmeia[\s-]noite\b)
+          |\b(?P<hour>\d{1,2})(?!\s*(?:horas?|hrs?|hours?)\b)(?P<mark>\s*[h:](?![a-zà-ú])\s*(?P<minute>\d{2})?)?)
+        (?P<period>\s+(?:da|de)\s+(?:manhã|manha|tarde|noite|madrugada))?
+        (?P<clock_sono>\s+de\s+sono)?)
+  | (?P<sep>[.;!?\n])
+    )
+""", re.IGNORECASE | re.VERBOSE)
+# Todo horário/duração tem um dígito ou "meia-noite": filtro barato antes do _VALUE_RE
+_VALUE_HINT_RE = re.compile(r'\d|meia', re.IGNORECASE)
+# Folga após MAX_KEYWORD_GAP para um token que começa no limite terminar
+MAX_TOKEN_LENGTH = 40
+
+
+class SleepRecord(NamedTuple):
+    """Uma noite de sono encontrada no texto (horas em formato decimal, 23.5 = 23h30)."""
+    bedtime: Optional[float]
+    wake_time: Optional[float]
+    duration: Optional[float]
+    confidence: float
+
+
+def _clock_value(match) -> Optional[float]:
+    """Converte um token de horário em hora decimal (ou None se não for um horário válido)."""
+    if match.group('midnight'):
+        return 0.0
+
+    hour = int(match.group('hour'))
+    minute = int(match.group('minute')) if match.group('minute') else 0
+    # Número solto ("às 7") só vale como horário com preposição ou período ("da noite")
+    if not (match.group('mark') or match.group('prep') or match.group('period')):
+        return None
+    if hour > 24 or minute > 59:
+        return None
+
+    period = (match.group('period') or '').lower()
+    if ('noite' in period or 'tarde' in period) and hour < 12:
+        hour += 12
+    elif ('manh' in period or 'madrugada' in period) and hour == 12:
+        hour = 0
+    return (hour % 24) + minute / 60
+
+
+def _night(bedtime: float, wake_time: float, confidence: float) -> Optional[SleepRecord]:
+    duration = wake_time - bedtime
+    if duration < 0:
+        duration += 24  # Acordou no dia seguinte
+    if duration == 0:
+        return None
+    if duration > MAX_SLEEP_HOURS:
+        confidence = min(confidence, 0.3)
+    return SleepRecord(bedtime, wake_time, round(duration, 2), confidence)
+
+
+def _duration_hours(match) -> float:
+    hours = float(match.group('dur_h').replace(',', '.'))
+    return hours + (int(match.group('dur_m')) / 60 if match.group('dur_m') else 0)
+
+
+def _add_duration(records: List[SleepRecord], hours: float, confidence: float):
+    if not 0 < hours <= MAX_SLEEP_HOURS:
+        return
+    last = records[-1] if records else None
+    if last and last.duration is not None and abs(last.duration - hours) <= 1 and confidence >= MIN_CONFIDENCE:
+        # Mesma noite descrita por horário e por duração (palpites fracos não reforçam)
+        records[-1] = last._replace(confidence=min(1.0, last.confidence + 0.1))
+    else:
+        records.append(SleepRecord(None, None, round(hours, 2), confidence))
+
+
+def _anchors(text: str) -> List[tuple]:
+    """(tipo, início, fim) de cada palavra-chave do texto."""
+    anchors = []
+    for match in _ANCHOR_RE.finditer(text):
+        start = match.start()
+        if start and text[start - 1].isalnum():
+            continue  # Meio de palavra ("redormi", "insono")
+        anchors.append((_ANCHOR_KIND[' '.join(match.group(0).lower().split())], start, match.end()))
+    return anchors
+
+
+def parse_sleep(text: str) -> List[SleepRecord]:
+    """
+    Encontra todas as menções de sono do texto.
+
+    Reconhece horários ("dormi às 23h", "acordei 6:30", "fui dormir 11:30", "meia-noite",
+    "11 da noite", "dormi até as 9h"), durações ("8 horas de sono", "dormi 7h30",
+    "dormi 7h", "dormi apenas 5 horas") e várias noites no mesmo registro. Um "dormi" só forma par com um "acordei" que
+    venha depois dele; "acordei" sem "dormi" antes fica sem par.
+
+    Após "dormi"/"durmo", "7h30" e "7h" sem preposição de horário ("às", "até", "por
+    volta de") nem período ("da noite") são duração ("dormi 7h30" = 7.5h, "dormi cerca
+    de 7h" = 7h); "dormi 23:30" continua horário. Após "dormir"/"deitei" são horários
+    ("fui dormir 11h" = 23h).
+
+    As palavras-chave são localizadas primeiro; só os MAX_KEYWORD_GAP caracteres
+    seguintes a cada uma são tokenizados em busca do horário ou da duração.
+
+    Returns:
+        Lista de SleepRecord em ordem de ocorrência (noites sem par têm duration=None)
+    """
+    if not isinstance(text, str) or not text:
+        return []
+
+    if text.isupper():
+        text = text.lower()  # A árvore de âncoras só cobre minúsculas e "Capitalizadas"
+    anchors = _anchors(text)
+    # Início da próxima palavra-chave de sono/vigília (fim do trecho de cada âncora)
+    next_keyword = []
+    boundary = len(text)
+    for kind, start, _ in reversed(anchors):
+        next_keyword.append(boundary)
+        if kind != 'sono':
+            boundary = start
+    next_keyword.reverse()
+
+    records: List[SleepRecord] = []
+    bedtime = None          # (hora, confiança) de um "dormi" ainda sem "acordei"
+    consumed = 0            # Fim do último horário/duração já usado
+
+    for (kind, start, end), window_end in zip(anchors, next_keyword):
+        if kind == 'sono':
+            if end <= consumed:
+                continue
+            match = _SONO_DURATION_RE.search(text, max(consumed, start - SONO_LOOKBEHIND), end)
+            if match:
+                _add_duration(records, _duration_hours(match), 0.8)
+                consumed = match.end()
+            continue
+
+        window_end = min(window_end, end + MAX_KEYWORD_GAP + MAX_TOKEN_LENGTH)
+        if not _VALUE_HINT_RE.search(text, end, window_end):
+            continue  # Nenhum número nem "meia-noite" por perto
+        for match in _VALUE_RE.finditer(text, end, window_end):
+            if match.group('sep') or match.start() - end > MAX_KEYWORD_GAP:
+                break
+
+            if match.group('duration'):
+                explicit = bool(match.group('dur_sono'))
+                if not (explicit or kind != 'wake'):
+                    continue
+                _add_duration(records, _duration_hours(match), 0.8 if explicit else 0.7)
+                consumed = match.end()
+                break
+
+            if match.group('clock_sono'):
+                # "7h30 de sono"
+                _add_duration(records, int(match.group('hour')) + int(match.group('minute') or 0) / 60, 0.8)
+                consumed = match.end()
+                break
+
+            if (kind == 'slept' and match.group('mark') and ':' not in match.group('mark')
+                    and not (match.group('prep') and not match.group('approx')) and not match.group('period')):
+                # "dormi 7h30", "dormi por 7h", "dormi cerca de 6h30"
+                hours = int(match.group('hour')) + int(match.group('minute') or 0) / 60
+                if 0 < hours <= 12:
+                    _add_duration(records, hours, 0.7)
+                    consumed = match.end()
+                    break
+
+            value = _clock_value(match)
+            if value is None:
+                continue
+            confidence = 0.9 if (match.group('prep') or match.group('period')) else 0.75
+            is_wake = kind == 'wake' or bool(match.group('until'))  # "dormi até as 9h"
+
+            if not is_wake:
+                period = (match.group('period') or '').lower()
+                if 7 <= value < 12 and not ('manh' in period or 'madrugada' in period):
+                    value += 12  # "fui dormir por volta das 10h" = 22h
+
+                if bedtime is not None:
+                    records.append(SleepRecord(bedtime[0], None, None, 0.3))
+                bedtime = (value, confidence)
+            elif bedtime is not None:
+                night = _night(bedtime[0], value, min(confidence, bedtime[1]))
+                if night:
+                    records.append(night)
+                bedtime = None
+            else:
+                records.append(SleepRecord(None, value, None, 0.3))
+            consumed = match.end()
+            break
+
+    if bedtime is not None:
+        records.append(SleepRecord(bedtime[0], None, None, 0.3))
+    return records
+
+
+def sleep_hours(text: str) -> float:
+    """Horas de sono do registro: a noite com maior confiança (0.0 se nenhuma)."""
+    best = None
+    for record in parse_sleep(text):
+        if record.duration is None or record.confidence < MIN_CONFIDENCE:
+            continue
+        if best is None or record.confidence > best.confidence:
+            best = record
+    return best.duration if best else 0.0
+
+
+def parse_sleep_series(texts: pd.Series) -> pd.Series:
+    """
+    Versão para colunas inteiras (backfills): cada texto distinto é analisado uma única vez.
+    """
+    lookup = {text: sleep_hours(text) for text in texts.dropna().unique()}
+    return texts.map(lookup).fillna(0.0).astype(float)